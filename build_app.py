@@ -2,24 +2,286 @@
 # -*- coding: utf-8 -*-
 """
 PySide6 小说阅读器 - 打包脚本
-支持将程序打包为单个可执行文件
+支持将程序打包为可直接运行的程序目录
 """
 
 import os
 import sys
-import subprocess
-import shutil
-import platform
-from pathlib import Path
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+from functools import partial
 
-class NovelReaderBuilder:
+COPY_BUFSIZE = 1024 * 1024  # 文件复制缓冲区大小 (1MB)
+FICLONE = 0x40049409         # Linux ioctl: 以 reflink 方式克隆整个文件
+BUILD_CACHE_KEEP = 3         # 保留最近使用的构建缓存份数（每份都是完整的程序目录）
+
+
+def _fastcopy(src, dst):
+    """复制文件内容及元数据，替代 shutil.copy2 的 64KB 小缓冲区复制"""
+    import shutil
+    
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        copied = False
+        
+        # Linux 上优先使用 copy_file_range，由内核（或 CoW/NFS 服务端）完成复制
+        if hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+                copied = True
+            except OSError:
+                # 不支持（如跨文件系统）时回退到缓冲复制
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        
+        if not copied:
+            shutil.copyfileobj(fsrc, fdst, length=COPY_BUFSIZE)
+    
+    shutil.copystat(src, dst)
+
+
+def _zero_copy(src, dst):
+    """复制大文件：优先 reflink (FICLONE)，其次 sendfile，不支持时回退到 _fastcopy"""
+    if not sys.platform.startswith("linux"):
+        _fastcopy(src, dst)
+        return
+    
+    import fcntl
+    import shutil
+    
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            # btrfs/xfs 等文件系统上只复制元数据，几乎没有开销
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            # 跨文件系统或不支持 reflink 时，使用 sendfile 在内核中复制
+            size = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except OSError:
+                offset = -1
+            
+            if offset != size:
+                fdst.close()
+                _fastcopy(src, dst)
+                return
+    
+    shutil.copystat(src, dst)
+
+
+def _link_or_copy(src, dst):
+    """同一文件系统上创建硬链接（O(1)，无数据写入），否则回退到 _zero_copy
+    
+    链接后的两个路径共享同一份数据，修改其中一个会影响另一个；
+    这里只用于 dist/ 中的构建产物，它们在下次构建时会被整体删除重建。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        _zero_copy(src, dst)
+
+
+def _copytree_tasks(src_dir, dst_dir, skip=()):
+    """创建目标目录结构，返回复制 src_dir 下各文件的任务列表（顶层的 skip 文件除外）"""
+    tasks = []
+    for root, dirs, files in os.walk(src_dir):
+        target = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target, exist_ok=True)
+        
+        # 指向目录的符号链接（如 macOS 的 framework）出现在 dirs 中，os.walk 不会进入，需原样保留
+        for name in dirs:
+            src = os.path.join(root, name)
+            if os.path.islink(src):
+                tasks.append(partial(os.symlink, os.readlink(src), os.path.join(target, name)))
+        
+        top_level = root == src_dir
+        for name in files:
+            if top_level and name in skip:
+                continue
+            src = os.path.join(root, name)
+            dst = os.path.join(target, name)
+            if os.path.islink(src):
+                tasks.append(partial(os.symlink, os.readlink(src), dst))
+            else:
+                tasks.append(partial(_link_or_copy, src, dst))
+    return tasks
+
+
+def _fast_rmtree(path):
+    """删除目录树，直接使用 os.scandir 返回的 DirEntry 类型信息，避免逐项 stat"""
+    with os.scandir(path) as it:
+        for entry in it:
+            # is_dir(follow_symlinks=False) 使用 getdents 返回的 d_type，无需额外系统调用
+            if entry.is_dir(follow_symlinks=False):
+                _fast_rmtree(entry)
+            else:
+                os.unlink(entry)
+    os.rmdir(path)
+
+
+def _write_text(path, content, mode=None):
+    """写入 UTF-8 文本文件，可选设置文件权限"""
+    # 一次编码后直接 os.write，小文件无需经过 TextIOWrapper 的缓冲和增量编码
+    data = memoryview(content.encode("utf-8"))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    if mode is not None:
+        os.chmod(path, mode)
+
+
+# 常驻工作进程的代码：逐行读取 JSON 命令，在同一个解释器中以 "python -m" 的方式运行模块，
+# 命令的标准输出直接丢弃，标准错误写入日志文件，执行结果通过独立的通道返回
+_WORKER_SOURCE = r"""
+import importlib, json, os, runpy, sys, traceback
+
+requests = os.fdopen(os.dup(0), encoding="utf-8")
+channel = os.fdopen(os.dup(1), "w", encoding="utf-8")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+
+for line in iter(requests.readline, ""):
+    request = json.loads(line)
+    saved_env = dict(os.environ)
+    os.environ.update(request["env"])
+    
+    log_fd = os.open(request["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    saved_fds = os.dup(1), os.dup(2)
+    os.dup2(devnull, 1)
+    os.dup2(log_fd, 2)
+    
+    sys.argv = [request["module"], *request["argv"]]
+    try:
+        runpy.run_module(request["module"], run_name="__main__", alter_sys=True)
+        returncode = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            returncode = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in (*saved_fds, log_fd):
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    
+    # 刚安装的包需要能被后续命令导入
+    importlib.invalidate_caches()
+    channel.write(json.dumps({"returncode": returncode}) + "\n")
+    channel.flush()
+"""
+
+
+class _ToolWorker:
+    """常驻的 Python 工作进程，在同一个解释器中依次运行 pip / PyInstaller"""
+    
     def __init__(self):
+        self.process = None
+    
+    def run(self, module, argv, env=None):
+        """运行 "python -m <module> <argv...>"，返回 (退出码, 错误输出)，成功时错误输出为空"""
+        import subprocess
+        import tempfile
+        
+        if self.process is None:
+            self.process = subprocess.Popen(
+                [sys.executable, "-u", "-c", _WORKER_SOURCE],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                text=True, encoding="utf-8")
+        
+        fd, log_path = tempfile.mkstemp(prefix="novelreader-build-", suffix=".log")
+        os.close(fd)
+        try:
+            request = {"module": module, "argv": list(argv), "env": env or {}, "log": log_path}
+            try:
+                self.process.stdin.write(json.dumps(request) + "\n")
+                self.process.stdin.flush()
+                response = self.process.stdout.readline()
+            except BrokenPipeError:
+                response = ""
+            
+            if response:
+                returncode = json.loads(response)["returncode"]
+                if returncode == 0:
+                    return returncode, ""
+            else:
+                # 工作进程崩溃（如 os._exit 或解释器异常退出），按普通失败返回，下次调用时重新启动
+                returncode = self._reap()
+            
+            # 只在失败时读取并解码错误输出
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                stderr = f.read()
+            if not response:
+                stderr += f"\n构建工作进程意外退出 (退出码 {returncode})"
+            return returncode, stderr
+        finally:
+            os.unlink(log_path)
+    
+    def _reap(self):
+        """回收已退出的工作进程，返回非零退出码"""
+        process, self.process = self.process, None
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if process.poll() is None:
+            process.kill()
+        return process.wait() or 1
+    
+    def close(self):
+        """结束工作进程"""
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
+
+
+class NovelReaderBuilder:
+    def __init__(self, compress=False):
         self.app_name = "小说阅读器"
+        # 是否使用 UPX 压缩：体积更小，但每次启动都要多解压一遍
+        self.compress = compress
         self.main_file = "main.py"
+        self.spec_file = f"{self.app_name}.spec"
+        # onedir 模式的输出目录
+        self.dist_dir = f"dist/{self.app_name}"
+        # 构建缓存目录：.build_cache/<输入内容哈希>/<可执行文件>
+        self.cache_dir = ".build_cache"
+        # pip / PyInstaller 共用一个常驻 Python 进程
+        self.worker = _ToolWorker()
+        import platform
         self.system = platform.system().lower()
+        # 准备步骤并行执行，输出需要串行化
+        self._print_lock = threading.Lock()
+        self._writers = self._make_writers()
+        # pip 下载缓存目录，CI 中缓存该目录即可避免每次重新下载 PySide6
+        self.pip_cache_dir = os.environ.get(
+            "PIP_CACHE_DIR", os.path.expanduser("~/.cache/novelreader-pip"))
         
-    def print_colored(self, message, color=""):
-        """打印彩色消息"""
+    def _make_writers(self):
+        """为每种颜色预先生成输出函数，省去每次调用时的查表和分支"""
         colors = {
             "red": "\033[91m",
             "green": "\033[92m", 
@@ -29,88 +291,117 @@ class NovelReaderBuilder:
             "cyan": "\033[96m",
             "white": "\033[97m",
             "bold": "\033[1m",
-            "end": "\033[0m"
         }
+        end = "\033[0m"
         
-        if color and color in colors:
-            print(f"{colors[color]}{message}{colors['end']}")
-        else:
-            print(message)
+        def make_writer(prefix, suffix):
+            def write(message):
+                with self._print_lock:
+                    print(f"{prefix}{message}{suffix}")
+            return write
+        
+        writers = {color: make_writer(code, end) for color, code in colors.items()}
+        writers[""] = make_writer("", "")
+        return writers
+    
+    def run_tool(self, args, env=None):
+        """在常驻工作进程中运行 "python -m <模块>" 形式的命令，返回 subprocess.CompletedProcess"""
+        import subprocess
+        
+        module, argv = args[2], args[3:]
+        returncode, stderr = self.worker.run(module, argv, env)
+        return subprocess.CompletedProcess(args, returncode, stdout=None, stderr=stderr)
     
     def check_python(self):
         """检查Python环境"""
-        self.print_colored("🔍 检查Python环境...", "blue")
+        self._writers["blue"]("🔍 检查Python环境...")
         
         version = sys.version_info
-        if version.major < 3 or (version.major == 3 and version.minor < 7):
-            self.print_colored("❌ 需要Python 3.7或更高版本", "red")
+        if version.major < 3 or (version.major == 3 and version.minor < 8):
+            self._writers["red"]("❌ 需要Python 3.8或更高版本")
             return False
             
-        self.print_colored(f"✅ Python {version.major}.{version.minor}.{version.micro}", "green")
+        self._writers["green"](f"✅ Python {version.major}.{version.minor}.{version.micro}")
         return True
     
-    def check_and_install_packages(self):
-        """检查并安装必要的包"""
-        self.print_colored("📦 检查依赖包...", "blue")
+    def find_missing_packages(self):
+        """检查依赖包，返回缺失的包列表"""
+        self._writers["blue"]("📦 检查依赖包...")
         
+        from importlib.util import find_spec
+        
+        # (显示名称, 导入名称)
+        # find_spec 只查找顶层模块而不执行其代码，无需为判断是否安装而导入 PySide6 等大型包；
+        # 也不关心由哪个发行包提供（如只装了 PySide6_Essentials）
         packages = [
             ("PySide6", "PySide6"),
             ("chardet", "chardet"), 
-            ("PyInstaller", "pyinstaller")
+            ("PyInstaller", "PyInstaller")
         ]
         
+        missing = []
         for package_name, import_name in packages:
-            try:
-                __import__(import_name)
-                self.print_colored(f"✅ {package_name} 已安装", "green")
-            except ImportError:
-                self.print_colored(f"⚠️  安装 {package_name}...", "yellow")
-                result = subprocess.run([sys.executable, "-m", "pip", "install", package_name], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    self.print_colored(f"✅ {package_name} 安装成功", "green")
-                else:
-                    self.print_colored(f"❌ {package_name} 安装失败: {result.stderr}", "red")
-                    return False
-        return True
+            if find_spec(import_name) is not None:
+                self._writers["green"](f"✅ {package_name} 已安装")
+            else:
+                missing.append(package_name)
+        return missing
+    
+    def install_packages(self, missing):
+        """安装缺失的包"""
+        if not missing:
+            return True
+        
+        # 一次性安装所有缺失的包，只付出一次 pip 启动开销
+        names = ", ".join(missing)
+        self._writers["yellow"](f"⚠️  安装 {names}...")
+        env = {"PIP_CACHE_DIR": self.pip_cache_dir}
+        result = self.run_tool([sys.executable, "-m", "pip", "install",
+                                "--disable-pip-version-check", "--prefer-binary",
+                                *missing],
+                               env=env)
+        if result.returncode == 0:
+            self._writers["green"](f"✅ {names} 安装成功")
+            return True
+        
+        self._writers["red"](f"❌ {names} 安装失败: {result.stderr}")
+        return False
     
     def clean_build_dirs(self):
         """清理构建目录"""
-        self.print_colored("🧹 清理构建目录...", "blue")
-        
-        dirs_to_clean = ['build', 'dist', '__pycache__', 'NovelReader_Portable']
-        files_to_clean = ['*.spec']
+        self._writers["blue"]("🧹 清理构建目录...")
         
-        for dir_name in dirs_to_clean:
-            if os.path.exists(dir_name):
-                shutil.rmtree(dir_name)
-                self.print_colored(f"  已清理: {dir_name}", "white")
+        # 保留 build/：其中是 PyInstaller 的分析缓存，输入未变化的部分下次可直接复用
+        dirs_to_clean = {'dist', '__pycache__', 'NovelReader_Portable'}
         
-        # 清理spec文件
-        for spec_file in Path('.').glob('*.spec'):
-            spec_file.unlink()
-            self.print_colored(f"  已清理: {spec_file}", "white")
+        # 一次遍历当前目录，同时清理构建目录和 spec 文件
+        with os.scandir('.') as it:
+            for entry in it:
+                if entry.name in dirs_to_clean and entry.is_dir(follow_symlinks=False):
+                    _fast_rmtree(entry)
+                # 保留由 ensure_spec_file 生成、可复用的 spec
+                elif entry.name.endswith('.spec') and entry.name != self.spec_file:
+                    os.unlink(entry)
+                else:
+                    continue
+                self._writers["white"](f"  已清理: {entry.name}")
     
-    def get_pyinstaller_args(self):
-        """获取PyInstaller参数"""
+    def get_spec_args(self):
+        """获取生成 spec 文件的参数"""
         args = [
-            "pyinstaller",
-            "--onefile",           # 打包成单个文件
+            sys.executable, "-m", "PyInstaller.utils.cliutils.makespec",
+            "--onedir",            # 打包成目录，启动时无需解压到临时目录
             "--noconsole",         # 不显示控制台
             "--windowed",          # 窗口模式
-            "--clean",             # 清理临时文件
-            "--noconfirm",         # 不需要确认
             "--name", self.app_name,  # 程序名称
+            *([] if self.compress else ["--noupx"]),  # 默认不压缩，加快启动
             
             # 添加数据文件
             "--add-data", "test.txt:.",
             "--add-data", "README.md:.",
             
-            # 隐式导入
+            # 隐式导入（PySide6 模块由 PyInstaller 自带的 hook 收集）
             "--hidden-import", "chardet",
-            "--hidden-import", "PySide6.QtCore",
-            "--hidden-import", "PySide6.QtWidgets", 
-            "--hidden-import", "PySide6.QtGui",
             
             # 排除不需要的模块
             "--exclude-module", "tkinter",
@@ -123,59 +414,205 @@ class NovelReaderBuilder:
             "--exclude-module", "PIL",
             "--exclude-module", "cv2",
             
+            # 排除未使用的大型 Qt 模块
+            "--exclude-module", "PySide6.QtWebEngineCore",
+            "--exclude-module", "PySide6.QtWebEngineWidgets",
+            "--exclude-module", "PySide6.QtQml",
+            "--exclude-module", "PySide6.QtQuick",
+            "--exclude-module", "PySide6.Qt3DCore",
+            "--exclude-module", "PySide6.QtMultimedia",
+            "--exclude-module", "PySide6.QtPdf",
+            
             self.main_file  # 主程序文件
         ]
         
+        # 以 -OO 级别编译打包的字节码（去除文档字符串和断言），体积更小、导入更快
+        if self.get_pyinstaller_version() >= (6, 6):
+            args[3:3] = ["--optimize", "2"]
+        
+        return args
+    
+    def get_pyinstaller_version(self):
+        """获取已安装的 PyInstaller 版本号，未安装时返回 (0, 0)"""
+        from importlib.metadata import distribution, PackageNotFoundError
+        
+        try:
+            version_text = distribution("pyinstaller").version
+        except PackageNotFoundError:
+            return (0, 0)
+        
+        parts = []
+        for part in version_text.split(".")[:2]:
+            digits = "".join(itertools.takewhile(str.isdigit, part))
+            parts.append(int(digits or 0))
+        return tuple(parts)
+    
+    def get_pyinstaller_args(self):
+        """获取PyInstaller参数"""
+        args = [
+            sys.executable, "-m", "PyInstaller",
+            "--noconfirm",         # 不需要确认
+            self.spec_file         # 预先生成的 spec 文件
+        ]
+        
+        if self.compress:
+            import shutil
+            upx_path = shutil.which("upx")
+            if upx_path:
+                args.insert(-1, f"--upx-dir={os.path.dirname(upx_path)}")
+        
         return args
     
+    def ensure_spec_file(self):
+        """生成 spec 文件，打包参数未变化时直接复用"""
+        spec_args = self.get_spec_args()
+        digest = hashlib.sha256("\0".join(spec_args).encode("utf-8")).hexdigest()
+        stamp = f"# build_app: {digest}\n"
+        
+        if os.path.exists(self.spec_file):
+            with open(self.spec_file, encoding="utf-8") as f:
+                if stamp in f.read():
+                    self._writers["white"](f"♻️  复用 {self.spec_file}")
+                    return True
+        
+        result = self.run_tool(spec_args)
+        if result.returncode != 0:
+            self._writers["red"]("❌ 生成 spec 文件失败！")
+            print(result.stderr)
+            return False
+        
+        # 记录生成参数，下次据此判断 spec 是否仍然有效
+        with open(self.spec_file, "a", encoding="utf-8") as f:
+            f.write(stamp)
+        return True
+    
+    def get_build_hash(self):
+        """计算构建输入（源文件、spec、打包参数、已安装包版本）的内容哈希"""
+        sha = hashlib.sha256()
+        for path in sorted([self.main_file, "test.txt", "README.md", self.spec_file]):
+            sha.update(path.encode("utf-8"))
+            with open(path, "rb") as f:
+                sha.update(f.read())
+        
+        sha.update("\0".join(self.get_pyinstaller_args()).encode("utf-8"))
+        
+        import importlib
+        from importlib.metadata import distributions
+        
+        # 依赖包可能刚被安装，需要刷新导入系统的目录缓存
+        importlib.invalidate_caches()
+        packages = sorted(f"{dist.metadata['Name']}=={dist.version}" for dist in distributions())
+        sha.update("\n".join(packages).encode("utf-8"))
+        
+        return sha.hexdigest()
+    
     def build_executable(self):
         """构建可执行文件"""
-        self.print_colored("🚀 开始打包...", "blue")
-        self.print_colored("这可能需要几分钟时间，请耐心等待...", "yellow")
+        self._writers["blue"]("🚀 开始打包...")
+        self._writers["yellow"]("这可能需要几分钟时间，请耐心等待...")
+        
+        import shutil
+        
+        if self.compress and not shutil.which("upx"):
+            self._writers["yellow"]("⚠️  未找到 upx，将不进行压缩")
         
         args = self.get_pyinstaller_args()
         
         try:
-            result = subprocess.run(args, capture_output=True, text=True, encoding='utf-8')
+            if not self.ensure_spec_file():
+                return False
+            
+            # 输入内容未变化时直接使用缓存的构建结果
+            build_hash = self.get_build_hash()
+            entry_dir = os.path.join(self.cache_dir, build_hash)
+            cached_dir = os.path.join(entry_dir, self.app_name)
+            if os.path.exists(cached_dir):
+                shutil.copytree(cached_dir, self.dist_dir, symlinks=True,
+                                copy_function=_fastcopy)
+                os.utime(entry_dir)  # 记录最近使用时间，清理缓存时保留
+                self._writers["green"]("♻️  输入未变化，使用缓存的构建结果")
+                return True
+            
+            result = self.run_tool(args)
             
             if result.returncode == 0:
-                self.print_colored("🎉 打包成功！", "green")
+                self._writers["green"]("🎉 打包成功！")
+                # 缓存写入失败不影响本次构建结果
+                try:
+                    self.store_build_cache(build_hash)
+                except OSError as e:
+                    self._writers["yellow"](f"⚠️  构建缓存写入失败: {e}")
                 return True
             else:
-                self.print_colored("❌ 打包失败！", "red")
-                self.print_colored("错误信息:", "red")
+                self._writers["red"]("❌ 打包失败！")
+                self._writers["red"]("错误信息:")
                 print(result.stderr)
                 return False
                 
         except Exception as e:
-            self.print_colored(f"❌ 打包过程中出现异常: {e}", "red")
+            self._writers["red"](f"❌ 打包过程中出现异常: {e}")
             return False
     
+    def store_build_cache(self, build_hash):
+        """将构建结果存入缓存，并只保留最近使用的 BUILD_CACHE_KEEP 份"""
+        import shutil
+        import tempfile
+        
+        # 先复制到临时目录再整体重命名，中断时不会留下被当作缓存命中的残缺目录
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        entry_dir = os.path.join(self.cache_dir, build_hash)
+        try:
+            shutil.copytree(self.dist_dir, os.path.join(tmp_dir, self.app_name),
+                            symlinks=True, copy_function=_fastcopy)
+            if os.path.isdir(entry_dir):
+                _fast_rmtree(entry_dir)  # 旧版本留下的残缺条目
+            os.replace(tmp_dir, entry_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        self.prune_build_cache()
+    
+    def prune_build_cache(self):
+        """删除较早的构建缓存和中断残留的临时目录"""
+        with os.scandir(self.cache_dir) as it:
+            entries = [entry for entry in it if entry.is_dir(follow_symlinks=False)]
+        
+        stale = [entry for entry in entries if entry.name.startswith(".tmp-")]
+        cached = sorted((entry for entry in entries if not entry.name.startswith(".tmp-")),
+                        key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in stale + cached[BUILD_CACHE_KEEP:]:
+            try:
+                _fast_rmtree(entry.path)
+            except OSError as e:
+                self._writers["yellow"](f"⚠️  无法清理构建缓存 {entry.name}: {e}")
+    
     def create_portable_package(self):
         """创建便携版"""
         exe_name = self.app_name
         if self.system == "windows":
             exe_name += ".exe"
         
-        exe_path = f"dist/{exe_name}"
+        exe_path = f"{self.dist_dir}/{exe_name}"
         
         if not os.path.exists(exe_path):
-            self.print_colored("❌ 可执行文件不存在", "red")
+            self._writers["red"]("❌ 可执行文件不存在")
             return False
         
-        self.print_colored("📦 创建便携版...", "blue")
+        self._writers["blue"]("📦 创建便携版...")
         
         # 创建便携版目录
         portable_dir = "NovelReader_Portable"
         if os.path.exists(portable_dir):
-            shutil.rmtree(portable_dir)
+            _fast_rmtree(portable_dir)
         
         os.makedirs(portable_dir)
         
-        # 复制文件
-        shutil.copy2(exe_path, f"{portable_dir}/{exe_name}")
-        shutil.copy2("README.md", f"{portable_dir}/README.md")
-        shutil.copy2("test.txt", f"{portable_dir}/test.txt")
+        # 复制 onedir 输出目录的全部内容，以及说明和示例文件
+        extra_files = ["README.md", "test.txt"]
+        tasks = _copytree_tasks(self.dist_dir, portable_dir, skip=extra_files)
+        tasks += [partial(_fastcopy, name, f"{portable_dir}/{name}") for name in extra_files]
         
         # 创建启动脚本
         if self.system != "windows":
@@ -183,9 +620,7 @@ class NovelReaderBuilder:
 cd "$(dirname "$0")"
 ./{exe_name}
 """
-            with open(f"{portable_dir}/启动.sh", "w", encoding="utf-8") as f:
-                f.write(start_script)
-            os.chmod(f"{portable_dir}/启动.sh", 0o755)
+            tasks.append(partial(_write_text, f"{portable_dir}/启动.sh", start_script, 0o755))
         
         # 创建说明文件
         readme_content = f"""# {self.app_name} 便携版
@@ -196,6 +631,7 @@ cd "$(dirname "$0")"
 
 ## 文件说明
 - {exe_name}: 主程序
+- 其余文件和目录: 运行所需的库文件，请与主程序放在一起
 - README.md: 程序说明
 - test.txt: 示例小说文件
 - 启动.sh: 启动脚本 (Linux/macOS)
@@ -205,11 +641,14 @@ cd "$(dirname "$0")"
 - 支持拖拽打开txt文件
 - 支持多种编码格式
 """
+        tasks.append(partial(_write_text, f"{portable_dir}/使用说明.txt", readme_content))
         
-        with open(f"{portable_dir}/使用说明.txt", "w", encoding="utf-8") as f:
-            f.write(readme_content)
+        # 各目标文件互不相关，并行执行以重叠磁盘 I/O
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda task: task(), tasks))
         
-        self.print_colored("✅ 便携版创建完成", "green")
+        self._writers["green"]("✅ 便携版创建完成")
         return True
     
     def show_results(self):
@@ -218,64 +657,82 @@ cd "$(dirname "$0")"
         if self.system == "windows":
             exe_name += ".exe"
         
-        exe_path = f"dist/{exe_name}"
+        exe_path = f"{self.dist_dir}/{exe_name}"
         
         if os.path.exists(exe_path):
-            file_size = os.path.getsize(exe_path) / (1024 * 1024)  # MB
+            total_size = sum(os.path.getsize(os.path.join(root, name))
+                             for root, _, files in os.walk(self.dist_dir)
+                             for name in files)
+            dir_size = total_size / (1024 * 1024)  # MB
             
-            self.print_colored(f"📄 输出文件: {exe_path}", "cyan")
-            self.print_colored(f"📏 文件大小: {file_size:.1f} MB", "cyan")
+            self._writers["cyan"](f"📄 输出文件: {exe_path}")
+            self._writers["cyan"](f"📏 目录大小: {dir_size:.1f} MB")
             
             # 设置执行权限 (Linux/macOS)
             if self.system != "windows":
                 os.chmod(exe_path, 0o755)
-                self.print_colored("🔐 已设置执行权限", "green")
+                self._writers["green"]("🔐 已设置执行权限")
             
-            self.print_colored("", "")
-            self.print_colored("🚀 使用方法:", "bold")
-            self.print_colored(f"  ./{exe_path}", "white")
+            self._writers[""]("")
+            self._writers["bold"]("🚀 使用方法:")
+            self._writers["white"](f"  ./{exe_path}")
             
             if os.path.exists("NovelReader_Portable"):
-                self.print_colored("", "")
-                self.print_colored("📦 便携版:", "bold") 
-                self.print_colored("  NovelReader_Portable/ 文件夹", "white")
-                self.print_colored("  可复制到任意位置使用", "white")
+                self._writers[""]("")
+                self._writers["bold"]("📦 便携版:")
+                self._writers["white"]("  NovelReader_Portable/ 文件夹")
+                self._writers["white"]("  可复制到任意位置使用")
     
     def build(self):
         """主构建流程"""
-        self.print_colored("=== PySide6 小说阅读器打包工具 ===", "bold")
+        self._writers["bold"]("=== PySide6 小说阅读器打包工具 ===")
         print()
         
         # 检查主程序文件
         if not os.path.exists(self.main_file):
-            self.print_colored(f"❌ 找不到主程序文件 {self.main_file}", "red")
+            self._writers["red"](f"❌ 找不到主程序文件 {self.main_file}")
             return False
         
+        # 检查环境、检查依赖、清理目录互不依赖，并行执行
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            python_future = executor.submit(self.check_python)
+            missing_future = executor.submit(self.find_missing_packages)
+            clean_future = executor.submit(self.clean_build_dirs)
+        
         # 执行构建步骤
         steps = [
-            ("检查Python环境", self.check_python),
-            ("检查依赖包", self.check_and_install_packages),
-            ("清理构建目录", lambda: (self.clean_build_dirs(), True)[1]),
+            ("检查Python环境", python_future.result),
+            ("检查依赖包", lambda: self.install_packages(missing_future.result())),
+            ("清理构建目录", lambda: (clean_future.result(), True)[1]),
             ("构建可执行文件", self.build_executable),
             ("创建便携版", self.create_portable_package),
         ]
         
-        for step_name, step_func in steps:
-            print()
-            if not step_func():
-                self.print_colored(f"❌ {step_name} 失败", "red")
-                return False
+        try:
+            for step_name, step_func in steps:
+                print()
+                if not step_func():
+                    self._writers["red"](f"❌ {step_name} 失败")
+                    return False
+        finally:
+            self.worker.close()
         
         print()
         self.show_results()
         
         print()
-        self.print_colored("=== 打包完成 ===", "bold")
+        self._writers["bold"]("=== 打包完成 ===")
         return True
 
 def main():
     """主函数"""
-    builder = NovelReaderBuilder()
+    parser = argparse.ArgumentParser(description="PySide6 小说阅读器打包工具")
+    parser.add_argument("--compress", action="store_true",
+                        help="使用 UPX 压缩可执行文件（体积更小，启动更慢）")
+    options = parser.parse_args()
+    
+    builder = NovelReaderBuilder(compress=options.compress)
     success = builder.build()
     
     if not success:
@@ -14,7 +14,17 @@ PySide6 文本小说阅读器
 import sys
 import os
 import re
-import chardet
+import codecs
+import bisect
+import itertools
+import mmap
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+try:
+    import cchardet as chardet  # faust-cchardet：C 实现的编码检测，比 chardet 快数倍
+except ImportError:
+    import chardet
 from typing import List, Tuple, Optional
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -24,10 +34,17 @@ from PySide6.QtWidgets import (
     QToolBar, QFrame, QScrollArea, QSlider, QCheckBox, QComboBox
 )
 from PySide6.QtCore import Qt, QThread, Signal, QTimer, QSettings
-from PySide6.QtGui import QFont, QColor, QPalette, QAction, QIcon, QTextCursor, QKeySequence
+from PySide6.QtGui import (
+    QFont, QColor, QPalette, QAction, QIcon, QTextCursor, QTextDocument, QKeySequence
+)
 
 
 DEBUG_MODE = False  # 是否启用调试模式
+CHAPTER_CACHE_SIZE = 32  # 缓存最近显示过的章节数量
+SEARCH_BATCH_SIZE = 64   # 搜索线程每批发送的结果数量
+READ_CHUNK_SIZE = 1024 * 1024  # 转码时每次读取的字节数
+FONT_SIZE_DELAY = 80     # 字号变化停止多少毫秒后才重新排版
+POSITION_DELAY = 50      # 光标停止移动多少毫秒后才更新位置信息
 
 def print_debug(message: str):
     """打印调试信息"""
@@ -35,60 +52,206 @@ def print_debug(message: str):
         print(f"[DEBUG] {message}")
 
 
+# 章节标题模式（按前缀合并为一个正则；匹配时允许行首缩进，整行作为章节标题）
+CHAPTER_PATTERN = (
+    r'第[零一二三四五六七八九十百千万0-9]+[章卷节]'
+    r'|(?:[Cc]hapter|CHAPTER)[^\S\r\n]*[0-9]+'
+    r'|章节[0-9]+'
+    r'|[0-9]+\.'
+)
+
+# 行首允许的缩进：ASCII 空白之外还有全角空格和 BOM
+INDENT_CHARS = '\u3000\ufeff'
+
+# 中文字符范围
+_CHINESE_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# BMP 之外的字符，在 UTF-16 中占两个码元
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+# 单独的 \r（旧式 Mac 换行）
+_LONE_CR_RE = re.compile(rb'\r(?!\n)')
+
+
+def find_keyword(text: str, keyword: str, case_sensitive: bool = False) -> List[int]:
+    """查找关键词在文本中所有（不重叠的）出现位置"""
+    if case_sensitive or keyword.lower() == keyword.upper():
+        # 区分大小写或关键词本身没有大小写（如中文）时直接用 str.find，无需正则
+        positions = []
+        position = text.find(keyword)
+        while position != -1:
+            positions.append(position)
+            position = text.find(keyword, position + len(keyword))
+        return positions
+    
+    return [match.start() for match in re.finditer(re.escape(keyword), text, re.IGNORECASE)]
+
+
+def _utf16_positions(text: str, positions: List[int]) -> List[int]:
+    """将字符串下标换算为 UTF-16 码元下标，与 QTextDocument / QTextCursor 的位置一致"""
+    astral = [match.start() for match in _ASTRAL_RE.finditer(text)]
+    if not astral:
+        return positions
+    return [position + bisect.bisect_left(astral, position) for position in positions]
+
+
+def _encode_pattern(pattern: str, encoding: str) -> bytes:
+    """将 str 正则转换为指定编码下的 bytes 正则，字符类中的非 ASCII 字符展开为多选分支"""
+    parts = []
+    for token in re.findall(r'\[[^\]]*\]|\\.|.', pattern):
+        if token.isascii():
+            parts.append(token.encode('ascii'))
+        elif token.startswith('['):
+            body = token[1:-1]
+            ascii_part = ''.join(ch for ch in body if ch.isascii())
+            alternatives = [f'[{ascii_part}]'.encode('ascii')] if ascii_part else []
+            for ch in body:
+                if not ch.isascii():
+                    try:
+                        alternatives.append(re.escape(ch.encode(encoding)))
+                    except UnicodeEncodeError:
+                        continue  # 该编码无法表示的字符不可能出现在文件中
+            parts.append(b'(?:' + b'|'.join(alternatives) + b')' if alternatives else b'(?!)')
+        else:
+            try:
+                parts.append(re.escape(token.encode(encoding)))
+            except UnicodeEncodeError:
+                parts.append(b'(?!)')  # 该分支在此编码下不可能匹配
+    return b''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def _chapter_pattern(encoding: str, lone_cr: bool = False) -> Tuple['re.Pattern', 're.Pattern']:
+    """
+    按文件编码编译章节标题正则，直接在原始字节上匹配，无需先解码全文
+    输出: (匹配换行符及其后标题的正则, 匹配文件开头标题的正则)，标题均在第 1 组
+    """
+    indent = [rb'[^\S\r\n]']
+    for ch in INDENT_CHARS:
+        try:
+            indent.append(re.escape(ch.encode(encoding)))
+        except UnicodeEncodeError:
+            continue
+    
+    heading = (rb'((?:' + b'|'.join(indent) + b')*(?:' +
+               _encode_pattern(CHAPTER_PATTERN, encoding) + rb')[^\r\n]*)')
+    
+    # 以换行符本身开头而不是用 ^ 定位行首，re 可以快速跳到下一个换行符，不必在每个字节上尝试匹配；
+    # 含有单独 \r 的文件才需要把 \r 也当作换行
+    newline = rb'[\r\n]' if lone_cr else rb'\n'
+    return re.compile(newline + heading), re.compile(heading)
+
+
 class ChapterParser:
     """章节解析器"""
     
     @staticmethod
-    def parse_chapters(text: str) -> List[Tuple[str, int, int]]:
+    def parse_chapters(data: bytes, encoding: str) -> Tuple[List[str], array, array]:
         """
-        解析章节
-        输出: [(章节名, 开始位置, 结束位置), ...]
+        在文件原始字节（bytes 或 mmap）上解析章节，encoding 须兼容 ASCII
+        输出: (章节名列表, 开始字节偏移数组, 结束字节偏移数组)
         """
-        chapters = []
-        
-        # 多种章节标题模式
-        patterns = [
-            r'^第[零一二三四五六七八九十百千万0-9]+章.*?$',
-            r'^第[0-9]+章.*?$',
-            r'^第[零一二三四五六七八九十百千万0-9]+卷.*?$',
-            r'^第[0-9]+卷.*?$',
-            r'^Chapter\s*[0-9]+.*?$',
-            r'^章节[0-9]+.*?$',
-            r'^[0-9]+\..*?$',
-            r'^第[零一二三四五六七八九十百千万0-9]+节.*?$',
-        ]
-        
-        combined_pattern = '|'.join(f'({pattern})' for pattern in patterns)
-        
-        lines = text.split('\n')
-        print_debug(f"Lines to process: {(lines)}")  # Debug output
-        current_pos = 0
-        
-        for i, line in enumerate(lines):
-            line_match = line.strip()
-            if line_match and re.match(combined_pattern, line_match, re.IGNORECASE):
-                print_debug(f"Found chapter: {line} (pos: {current_pos})")  # Debug output
-                if chapters:
-                    # 更新上一章的结束位置
-                    chapters[-1] = (chapters[-1][0], chapters[-1][1], current_pos)
-                
-                chapters.append((line, current_pos, len(text)))
-            
-            current_pos += len(line) + 1  # +1 for newline
-            print_debug(f"Processing line {i+1}: {line} (pos: {current_pos})")  # Debug output
+        # utf-8-sig 只是开头多了 BOM：按 utf-8 匹配，并从 BOM 之后开始
+        offset = 0
+        if encoding == 'utf-8-sig':
+            encoding = 'utf-8'
+            if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+                offset = len(codecs.BOM_UTF8)
+        
+        line_pattern, first_pattern = _chapter_pattern(
+            encoding, _LONE_CR_RE.search(data) is not None)
+        
+        # 文件开头的标题前没有换行符，单独检查
+        matches = itertools.chain(filter(None, [first_pattern.match(data, offset)]),
+                                  line_pattern.finditer(data, offset))
+        
+        # 每个匹配自带行首位置，只需解码标题本身；偏移存入紧凑的整数数组而不是逐章的元组
+        titles = []
+        starts = array('q')
+        for match in matches:
+            titles.append(match.group(1).decode(encoding, 'replace').strip())
+            starts.append(match.start(1))
 
-        print_debug(f"Total chapters found: {chapters}")  # Debug output
+        if DEBUG_MODE:  # 关闭调试时不格式化章节列表
+            print_debug(f"Total chapters found: {len(titles)}")
 
         # 如果没有找到章节，将整个文本作为一章
-        if not chapters:
-            chapters.append(("全文", 0, len(text)))
+        if not titles:
+            titles.append("全文")
+            starts.append(offset)
         
-        return chapters
+        # 每章的结束位置即下一章的开始位置
+        ends = starts[1:]
+        ends.append(len(data))
+        
+        return titles, starts, ends
+    
+    @staticmethod
+    def parse_file(file_path: str, encoding: str
+                   ) -> Tuple[Tuple[List[str], array, array], bytes, str, Optional[Tuple[int, int]]]:
+        """
+        解析文件章节
+        输出: (parse_chapters 的结果, 文件内容（mmap 或 bytes）, 文件内容的编码,
+              映射时文件的 (大小, 修改时间)，未使用内存映射时为 None)
+        """
+        # utf-8-sig 的编码器会先输出 BOM，需单独判断；它与 utf-8 一样可以直接在原始字节上匹配
+        if encoding == 'utf-8-sig':
+            data_encoding = 'utf-8'
+        elif '\n'.encode(encoding) == b'\n':
+            data_encoding = encoding
+        else:
+            # UTF-16 等编码无法直接在原始字节上匹配，分块增量解码并转为 UTF-8 后在内存中解析
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            parts = []
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                    parts.append(decoder.decode(chunk).encode('utf-8'))
+            parts.append(decoder.decode(b'', final=True).encode('utf-8'))
+            file_data = b''.join(parts)
+            return ChapterParser.parse_chapters(file_data, 'utf-8'), file_data, 'utf-8', None
+        
+        with open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                # 空文件无法 mmap
+                return ChapterParser.parse_chapters(b'', encoding), b'', data_encoding, None
+            # 映射在关闭文件后仍然有效，保留下来作为按偏移读取章节的数据源
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return (ChapterParser.parse_chapters(data, encoding), data, data_encoding,
+                    (stat.st_size, stat.st_mtime_ns))
+        except Exception:
+            data.close()
+            raise
+
+
+class ChapterParseThread(QThread):
+    """章节解析线程"""
+    chapters_parsed = Signal(list, object, object)  # 章节名列表, 开始字节偏移数组, 结束字节偏移数组
+    parse_failed = Signal(str)       # 错误信息
+    
+    def __init__(self, file_path: str, encoding: str, forced: bool = False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.encoding = encoding
+        self.forced = forced  # 是否为用户指定的编码
+        self.file_data = b''
+        self.data_encoding = encoding  # 文件内容转码后与 encoding 不同
+        self.file_signature = None
+    
+    def run(self):
+        try:
+            chapters, self.file_data, self.data_encoding, self.file_signature = \
+                ChapterParser.parse_file(self.file_path, self.encoding)
+        except Exception as e:
+            self.parse_failed.emit(str(e))
+            return
+        self.chapters_parsed.emit(*chapters)
 
 
 class SearchThread(QThread):
     """搜索线程"""
-    result_found = Signal(int, str)  # 位置, 上下文
+    results_found = Signal(list)     # [(位置, 上下文), ...]，批量发送以减少跨线程信号
     finished_search = Signal(int)    # 总结果数
     
     def __init__(self, text: str, keyword: str, case_sensitive: bool = False):
@@ -103,19 +266,21 @@ class SearchThread(QThread):
             self.finished_search.emit(0)
             return
         
-        flags = 0 if self.case_sensitive else re.IGNORECASE
-        pattern = re.escape(self.keyword)
-        
-        for match in re.finditer(pattern, self.text, flags):
-            start = match.start()
+        batch = []
+        for start in find_keyword(self.text, self.keyword, self.case_sensitive):
             # 获取上下文（前后各50个字符）
             context_start = max(0, start - 50)
             context_end = min(len(self.text), start + len(self.keyword) + 50)
             context = self.text[context_start:context_end]
             
             self.results.append((start, context))
-            self.result_found.emit(start, context)
+            batch.append((start, context))
+            if len(batch) >= SEARCH_BATCH_SIZE:
+                self.results_found.emit(batch)
+                batch = []
         
+        if batch:
+            self.results_found.emit(batch)
         self.finished_search.emit(len(self.results))
 
 
@@ -125,11 +290,38 @@ class NovelReader(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = QSettings("NovelReader", "Settings")
-        self.text_content = ""
-        self.chapters = []
+        self._file_data = b''  # 文件的内存映射；非 ASCII 兼容编码的文件为转成 UTF-8 的内容
+        self._encoding = 'utf-8'
+        self._parse_thread = None  # 当前的章节解析线程
+        # 当前文件的路径、打开时的 (编码, 是否强制编码)，以及映射时的 (大小, 修改时间)
+        self._file_path = None
+        self._file_open_encoding = ('utf-8', False)
+        self._file_signature = None
+        self._current_chapter_len = 0  # 当前章节文本长度，用于计算总页数
+        
+        # 拖动字号滑块、连续移动光标时会不断触发信号，用单次定时器合并为一次处理
+        self._pending_font_size = None
+        self._font_timer = QTimer(self)
+        self._font_timer.setSingleShot(True)
+        self._font_timer.setInterval(FONT_SIZE_DELAY)
+        self._font_timer.timeout.connect(self.apply_font_size)
+        self._position_timer = QTimer(self)
+        self._position_timer.setSingleShot(True)
+        self._position_timer.setInterval(POSITION_DELAY)
+        self._position_timer.timeout.connect(self.update_position_info)
+        # 章节按列分开保存：标题列表和两个字节偏移数组
+        self._chapter_titles = []
+        self._chapter_starts = array('q')
+        self._chapter_ends = array('q')
         self.current_chapter = 0
+        # 章节缓存（LRU）：章节索引 -> (章节文本长度, 已排版的 QTextDocument)
+        self._chapter_cache = OrderedDict()
+        # 搜索缓存：(章节索引或 -1 表示全书, 关键词, 区分大小写) -> [(章节索引, 章内位置), ...]
+        self._search_cache = {}
         self.search_results = []
         self.current_search_index = -1
+        self._search_keyword = ""
+        self._search_find_flags = QTextDocument.FindFlag(0)
         
         self.init_ui()
         self.load_settings()
@@ -175,10 +367,12 @@ class NovelReader(QMainWindow):
             ('ASCII', 'ascii'),
         ]
         
+        # 编码保存在 action 的数据中，整个菜单共用一个槽函数
         for name, encoding in common_encodings:
             encoding_action = QAction(name, self)
-            encoding_action.triggered.connect(lambda checked, enc=encoding: self.open_file_with_encoding(enc))
+            encoding_action.setData(encoding)
             encoding_menu.addAction(encoding_action)
+        encoding_menu.triggered.connect(self.on_encoding_action_triggered)
         
         file_menu.addSeparator()
         
@@ -203,8 +397,9 @@ class NovelReader(QMainWindow):
         sizes = [8, 10, 12, 14, 16, 18, 20, 24, 28, 32, 36, 48, 72]
         for size in sizes:
             size_action = QAction(f"{size}号", self)
-            size_action.triggered.connect(lambda checked, s=size: self.set_font_size_direct(s))
+            size_action.setData(size)
             font_size_menu.addAction(size_action)
+        font_size_menu.triggered.connect(self.on_font_size_action_triggered)
         
         view_menu.addSeparator()
         
@@ -273,9 +468,17 @@ class NovelReader(QMainWindow):
         
         last_chapter_action = QAction("最后一章(&L)", self)
         last_chapter_action.setShortcut("Ctrl+End")
-        last_chapter_action.triggered.connect(lambda: self.display_chapter(len(self.chapters) - 1))
+        last_chapter_action.triggered.connect(lambda: self.display_chapter(len(self._chapter_titles) - 1))
         nav_menu.addAction(last_chapter_action)
     
+    def on_encoding_action_triggered(self, action):
+        """编码菜单项被点击"""
+        self.open_file_with_encoding(action.data())
+    
+    def on_font_size_action_triggered(self, action):
+        """字体大小菜单项被点击"""
+        self.set_font_size_direct(action.data())
+    
     def create_toolbar(self):
         """创建工具栏"""
         toolbar = QToolBar()
@@ -396,6 +599,9 @@ class NovelReader(QMainWindow):
         self.case_sensitive_cb = QCheckBox("区分大小写")
         search_layout.addWidget(self.case_sensitive_cb)
         
+        self.whole_book_cb = QCheckBox("搜索全书")
+        search_layout.addWidget(self.whole_book_cb)
+        
         search_btn = QPushButton("搜索")
         search_btn.clicked.connect(self.start_search)
         search_layout.addWidget(search_btn)
@@ -429,7 +635,7 @@ class NovelReader(QMainWindow):
         self.status_bar.addPermanentWidget(self.position_label)
         
         # 连接光标位置变化信号
-        self.text_area.cursorPositionChanged.connect(self.update_position_info)
+        self.text_area.cursorPositionChanged.connect(self._position_timer.start)
     
     def eventFilter(self, obj, event):
         """事件过滤器，处理滚轮和键盘事件"""
@@ -482,7 +688,7 @@ class NovelReader(QMainWindow):
     
     def can_go_to_next_chapter(self):
         """检查是否可以跳转到下一章"""
-        return self.current_chapter < len(self.chapters) - 1
+        return self.current_chapter < len(self._chapter_titles) - 1
     
     def can_go_to_previous_chapter(self):
         """检查是否可以跳转到上一章"""
@@ -495,9 +701,10 @@ class NovelReader(QMainWindow):
             self.display_chapter(next_chapter)
             
             # 显示提示信息
-            chapter_title = self.chapters[next_chapter][0]
+            chapter_title = self._chapter_titles[next_chapter]
             self.status_bar.showMessage(f"已跳转到下一章: {chapter_title}", 2000)
-            print_debug(f"自动跳转到下一章: {next_chapter}")
+            if DEBUG_MODE:
+                print_debug(f"自动跳转到下一章: {next_chapter}")
     
     def go_to_previous_chapter(self):
         """跳转到上一章"""
@@ -510,9 +717,10 @@ class NovelReader(QMainWindow):
             scrollbar.setValue(scrollbar.maximum())
             
             # 显示提示信息
-            chapter_title = self.chapters[prev_chapter][0]
+            chapter_title = self._chapter_titles[prev_chapter]
             self.status_bar.showMessage(f"已跳转到上一章: {chapter_title}", 2000)
-            print_debug(f"自动跳转到上一章: {prev_chapter}")
+            if DEBUG_MODE:
+                print_debug(f"自动跳转到上一章: {prev_chapter}")
     
     def toggle_sidebar(self):
         """切换侧边栏显示/隐藏"""
@@ -556,14 +764,28 @@ class NovelReader(QMainWindow):
         try:
             # 读取文件前面部分进行编码检测
             with open(file_path, 'rb') as f:
-                raw_data = f.read(10240)  # 读取前10KB用于检测
+                raw_data = f.read(262144)  # 读取前256KB用于检测
+            
+            # 有 BOM 的文件直接确定编码
+            if raw_data.startswith(codecs.BOM_UTF8):
+                return 'utf-8-sig'
+            if raw_data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                return 'utf-16'
+            
+            # 能按 UTF-8 严格解码则无需再调用 chardet（允许末尾截断在多字节字符中间）
+            try:
+                codecs.getincrementaldecoder('utf-8')().decode(raw_data, final=False)
+                return 'utf-8'
+            except UnicodeDecodeError:
+                pass
             
-            # 使用 chardet 检测编码
-            detected = chardet.detect(raw_data)
-            detected_encoding = detected.get('encoding', '').lower()
-            confidence = detected.get('confidence', 0)
+            # 使用 chardet 检测编码（前10KB已足够，且 chardet 耗时与输入长度成正比）
+            detected = chardet.detect(raw_data[:10240])
+            detected_encoding = (detected.get('encoding') or '').lower()
+            confidence = detected.get('confidence') or 0
             
-            print_debug(f"Chardet 检测结果: {detected_encoding}, 置信度: {confidence}")
+            if DEBUG_MODE:
+                print_debug(f"Chardet 检测结果: {detected_encoding}, 置信度: {confidence}")
             
             # 如果 chardet 检测置信度很高，直接使用
             if confidence > 0.8 and detected_encoding:
@@ -580,16 +802,16 @@ class NovelReader(QMainWindow):
             # 如果 chardet 检测不够可靠，逐个尝试编码
             for encoding in encodings_to_try:
                 try:
-                    # 尝试解码整个文件
-                    with open(file_path, 'r', encoding=encoding, errors='strict') as f:
-                        content = f.read()
-                        # 如果成功读取且包含中文字符，优先选择
-                        if self.contains_chinese(content):
-                            print(f"通过中文检测选择编码: {encoding}")
-                            return encoding
-                        elif encoding == 'utf-8':
-                            print(f"默认使用 UTF-8 编码")
-                            return encoding
+                    # 只在内存中解码已读取的样本，不再重新读取整个文件
+                    decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+                    content = decoder.decode(raw_data, final=False)
+                    # 如果成功读取且包含中文字符，优先选择
+                    if self.contains_chinese(content):
+                        print(f"通过中文检测选择编码: {encoding}")
+                        return encoding
+                    elif encoding == 'utf-8':
+                        print(f"默认使用 UTF-8 编码")
+                        return encoding
                 except (UnicodeDecodeError, UnicodeError):
                     continue
             
@@ -604,10 +826,7 @@ class NovelReader(QMainWindow):
         """
         检查文本是否包含中文字符
         """
-        import re
-        # 匹配中文字符范围
-        chinese_pattern = re.compile(r'[\u4e00-\u9fff]+')
-        return bool(chinese_pattern.search(text[:1000]))  # 只检查前1000个字符
+        return _CHINESE_RE.search(text, 0, 1000) is not None  # 只检查前1000个字符
     
     def open_file(self):
         """打开文件"""
@@ -615,26 +834,11 @@ class NovelReader(QMainWindow):
             self, "打开文本文件", "", "文本文件 (*.txt);;所有文件 (*.*)")
         
         if file_path:
-            try:
-                # 检测文件编码
-                encoding = self.detect_encoding(file_path)
-                
-                # 读取文件内容
-                with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                    self.text_content = f.read()
-                
-                # 解析章节
-                self.chapters = ChapterParser.parse_chapters(self.text_content)
-                
-                # 更新界面
-                self.update_chapter_list()
-                self.update_chapter_combo()
-                self.display_chapter(0)
-                
-                self.status_bar.showMessage(f"已加载文件: {os.path.basename(file_path)} (编码: {encoding})")
-                
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"无法打开文件:\n{str(e)}")
+            # 检测文件编码
+            encoding = self.detect_encoding(file_path)
+            
+            # 在后台线程中解析章节
+            self.start_chapter_parse(file_path, encoding)
     
     def open_file_with_encoding(self, encoding):
         """使用指定编码打开文件"""
@@ -642,51 +846,183 @@ class NovelReader(QMainWindow):
             self, f"使用 {encoding.upper()} 编码打开文本文件", "", "文本文件 (*.txt);;所有文件 (*.*)")
         
         if file_path:
-            try:
-                # 使用指定编码读取文件内容
-                with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                    self.text_content = f.read()
-                
-                # 解析章节
-                self.chapters = ChapterParser.parse_chapters(self.text_content)
-                
-                # 更新界面
-                self.update_chapter_list()
-                self.update_chapter_combo()
-                self.display_chapter(0)
-                
-                self.status_bar.showMessage(f"已加载文件: {os.path.basename(file_path)} (强制编码: {encoding.upper()})")
-                
-            except Exception as e:
-                QMessageBox.critical(self, "编码错误", 
-                                   f"使用 {encoding.upper()} 编码打开文件失败:\n{str(e)}\n\n"
-                                   f"请尝试其他编码或使用自动检测。")
+            self.start_chapter_parse(file_path, encoding, forced=True)
+    
+    def start_chapter_parse(self, file_path: str, encoding: str, forced: bool = False):
+        """启动章节解析线程，避免解析大文件时界面卡顿"""
+        thread = ChapterParseThread(file_path, encoding, forced, self)
+        thread.chapters_parsed.connect(self.on_chapters_parsed)
+        thread.parse_failed.connect(self.on_chapter_parse_failed)
+        thread.finished.connect(thread.deleteLater)
+        self._parse_thread = thread
+        
+        self.status_bar.showMessage("解析章节...")
+        thread.start()
+    
+    def on_chapters_parsed(self, titles, starts, ends):
+        """章节解析完成"""
+        thread = self.sender()
+        if thread is not self._parse_thread:
+            # 解析期间又打开了其他文件，忽略旧的结果
+            if isinstance(thread.file_data, mmap.mmap):
+                thread.file_data.close()
+            return
+        self._parse_thread = None
+        
+        # 只保留文件映射、编码和章节偏移表，显示时再解码对应章节
+        self.close_file_data()
+        self._file_data = thread.file_data
+        self._encoding = thread.data_encoding
+        self._file_path = thread.file_path
+        self._file_open_encoding = (thread.encoding, thread.forced)
+        self._file_signature = thread.file_signature
+        self._chapter_titles = titles
+        self._chapter_starts = starts
+        self._chapter_ends = ends
+        
+        # 更新界面
+        self.clear_chapter_cache()
+        self._search_cache.clear()
+        self.update_chapter_list()
+        self.update_chapter_combo()
+        self.display_chapter(0)
+        
+        file_name = os.path.basename(thread.file_path)
+        if thread.forced:
+            self.status_bar.showMessage(f"已加载文件: {file_name} (强制编码: {thread.encoding.upper()})")
+        else:
+            self.status_bar.showMessage(f"已加载文件: {file_name} (编码: {thread.encoding})")
+    
+    def on_chapter_parse_failed(self, error):
+        """章节解析失败"""
+        thread = self.sender()
+        if thread is not self._parse_thread:
+            return
+        self._parse_thread = None
+        self.status_bar.clearMessage()
+        
+        if thread.forced:
+            encoding = thread.encoding.upper()
+            QMessageBox.critical(self, "编码错误", 
+                               f"使用 {encoding} 编码打开文件失败:\n{error}\n\n"
+                               f"请尝试其他编码或使用自动检测。")
+        else:
+            QMessageBox.critical(self, "错误", f"无法打开文件:\n{error}")
+    
+    def read_chapter_text(self, chapter_index: int) -> str:
+        """按字节偏移读取并解码一章文本"""
+        start = self._chapter_starts[chapter_index]
+        end = self._chapter_ends[chapter_index]
+        
+        # 通过 memoryview 直接解码映射中的字节，不先复制出一份 bytes
+        with memoryview(self._file_data) as view:
+            chapter_text = str(view[start:end], self._encoding, 'replace')
+        
+        # 与文本模式读取一致，统一换行符
+        return chapter_text.replace('\r\n', '\n').replace('\r', '\n')
+    
+    def close_file_data(self):
+        """释放当前文件的内存映射"""
+        if isinstance(self._file_data, mmap.mmap):
+            self._file_data.close()
+        self._file_data = b''
+        self._file_signature = None
+    
+    def file_changed(self) -> bool:
+        """映射的文件在打开后是否被其他程序修改过"""
+        if self._file_signature is None:
+            return False  # 内容不是内存映射，不受文件修改影响
+        try:
+            stat = os.stat(self._file_path)
+        except OSError:
+            return True
+        return (stat.st_size, stat.st_mtime_ns) != self._file_signature
+    
+    def ensure_file_unchanged(self) -> bool:
+        """
+        读取内存映射前检查文件是否被修改（访问被截断的映射会触发 SIGBUS 直接终止程序）
+        已修改时释放映射并重新解析文件，返回 False
+        """
+        if not self.file_changed():
+            return True
+        
+        encoding, forced = self._file_open_encoding
+        self.close_file_data()
+        self._chapter_titles = []
+        self._chapter_starts = array('q')
+        self._chapter_ends = array('q')
+        self.start_chapter_parse(self._file_path, encoding, forced)
+        self.status_bar.showMessage("文件已被其他程序修改，正在重新解析章节...")
+        return False
     
     def update_chapter_list(self):
         """更新章节列表"""
+        # 暂停重绘并一次性添加所有条目，避免每插入一项就重新布局
+        self.chapter_tree.setUpdatesEnabled(False)
         self.chapter_tree.clear()
         
-        for i, (title, start, end) in enumerate(self.chapters):
+        items = []
+        for i, title in enumerate(self._chapter_titles):
             item = QTreeWidgetItem([f"{i+1:02d}. {title}"])
             item.setData(0, Qt.UserRole, i)
-            self.chapter_tree.addTopLevelItem(item)
+            items.append(item)
+        self.chapter_tree.addTopLevelItems(items)
+        self.chapter_tree.setUpdatesEnabled(True)
     
     def update_chapter_combo(self):
         """更新章节下拉框"""
+        # 屏蔽信号，避免清空和填充时触发 jump_to_chapter
+        self.chapter_combo.blockSignals(True)
         self.chapter_combo.clear()
-        
-        for i, (title, start, end) in enumerate(self.chapters):
-            self.chapter_combo.addItem(f"{i+1:02d}. {title}")
+        self.chapter_combo.addItems(
+            [f"{i+1:02d}. {title}" for i, title in enumerate(self._chapter_titles)])
+        self.chapter_combo.blockSignals(False)
+    
+    def get_chapter(self, chapter_index: int) -> Tuple[int, QTextDocument]:
+        """获取章节文本长度及对应的文档，最近使用的章节直接从缓存返回"""
+        cached = self._chapter_cache.get(chapter_index)
+        if cached is not None:
+            self._chapter_cache.move_to_end(chapter_index)
+            return cached
+        
+        chapter_text = self.read_chapter_text(chapter_index)
+        chapter_text+=("\n\n---end---\n")  # 确保章节末尾有换行
+        
+        document = QTextDocument(self)
+        document.setUndoRedoEnabled(False)
+        document.setDefaultFont(self.text_area.font())
+        document.setPlainText(chapter_text)
+        
+        # 只缓存长度，文本内容已保存在文档中
+        self._chapter_cache[chapter_index] = (len(chapter_text), document)
+        if len(self._chapter_cache) > CHAPTER_CACHE_SIZE:
+            _, (_, old_document) = self._chapter_cache.popitem(last=False)
+            old_document.deleteLater()
+        
+        return self._chapter_cache[chapter_index]
+    
+    def clear_chapter_cache(self):
+        """清空章节缓存（打开新文件时调用）"""
+        for _, document in self._chapter_cache.values():
+            document.deleteLater()
+        self._chapter_cache.clear()
     
     def display_chapter(self, chapter_index: int):
         """显示指定章节"""
-        if 0 <= chapter_index < len(self.chapters):
+        if 0 <= chapter_index < len(self._chapter_titles):
+            # 未缓存的章节需要从映射中读取
+            if chapter_index not in self._chapter_cache and not self.ensure_file_unchanged():
+                return
             self.current_chapter = chapter_index
-            title, start, end = self.chapters[chapter_index]
+            title = self._chapter_titles[chapter_index]
             
-            chapter_text = self.text_content[start:end]
-            chapter_text+=("\n\n---end---\n")  # 确保章节末尾有换行
-            self.text_area.setPlainText(chapter_text)
+            # 切换到已排版的文档，避免每次导航都重新解析和排版整章文本
+            chapter_len, document = self.get_chapter(chapter_index)
+            font = self.text_area.font()
+            if document.defaultFont() != font:
+                document.setDefaultFont(font)
+            self._current_chapter_len = chapter_len
+            self.text_area.setDocument(document)
             
             # 确保光标移动到文档开头
             cursor = self.text_area.textCursor()
@@ -696,20 +1032,20 @@ class NovelReader(QMainWindow):
             # 确保滚动到顶部
             self.text_area.verticalScrollBar().setValue(0)
             
-            # 更新章节选择
+            # 更新章节选择（屏蔽信号，避免 jump_to_chapter 再次显示同一章节）
+            self.chapter_combo.blockSignals(True)
             self.chapter_combo.setCurrentIndex(chapter_index)
+            self.chapter_combo.blockSignals(False)
             
-            # 高亮当前章节
-            for i in range(self.chapter_tree.topLevelItemCount()):
-                item = self.chapter_tree.topLevelItem(i)
-                if i == chapter_index:
-                    item.setSelected(True)
-                    self.chapter_tree.scrollToItem(item)
-                else:
-                    item.setSelected(False)
+            # 高亮当前章节（单选模式下设置当前项即会取消其他项的选中，无需遍历所有章节）
+            item = self.chapter_tree.topLevelItem(chapter_index)
+            if item is not None:
+                self.chapter_tree.setCurrentItem(item)
+                self.chapter_tree.scrollToItem(item)
             
             self.update_position_info()
-            print_debug(f"显示章节 {chapter_index}: {title}")
+            if DEBUG_MODE:
+                print_debug(f"显示章节 {chapter_index}: {title}")
     
     def on_chapter_clicked(self, item, column):
         """章节列表点击事件"""
@@ -723,16 +1059,26 @@ class NovelReader(QMainWindow):
             self.display_chapter(index)
     
     def change_font_size(self, size):
-        """改变字体大小"""
+        """改变字体大小（延迟应用，拖动滑块时只在停下后重新排版一次）"""
         self.font_size_label.setText(str(size))
+        self._pending_font_size = size
+        self._font_timer.start()
+    
+    def apply_font_size(self):
+        """应用等待中的字体大小"""
+        self._font_timer.stop()
+        if self._pending_font_size is None:
+            return
         font = self.text_area.font()
-        font.setPointSize(size)
+        font.setPointSize(self._pending_font_size)
+        self._pending_font_size = None
         self.text_area.setFont(font)
     
     def set_font_size_direct(self, size):
         """直接设置字体大小"""
         self.font_size_slider.setValue(size)
         self.change_font_size(size)
+        self.apply_font_size()
     
     def increase_font_size(self):
         """增大字体"""
@@ -849,16 +1195,50 @@ class NovelReader(QMainWindow):
         case_sensitive = self.case_sensitive_cb.isChecked()
         
         # 清空之前的搜索结果
-        self.search_results.clear()
         self.current_search_index = -1
         
-        # 在当前章节中搜索
-        current_text = self.text_area.toPlainText()
-        flags = 0 if case_sensitive else re.IGNORECASE
-        pattern = re.escape(keyword)
+        # 尚未打开文件时没有可搜索的内容
+        if not self._chapter_titles:
+            self.search_results = []
+            self.search_info_label.setText("未找到结果")
+            return
+        
+        whole_book = self.whole_book_cb.isChecked()
+        if ((whole_book or self.current_chapter not in self._chapter_cache)
+                and not self.ensure_file_unchanged()):
+            self.search_results = []
+            self.search_info_label.setText("文件已修改，请重新搜索")
+            return
         
-        for match in re.finditer(pattern, current_text, flags):
-            self.search_results.append(match.start())
+        find_flags = (QTextDocument.FindFlag.FindCaseSensitively if case_sensitive
+                      else QTextDocument.FindFlag(0))
+        self._search_keyword = keyword
+        self._search_find_flags = find_flags
+        
+        # 相同的查询直接使用缓存的结果
+        cache_key = (-1 if whole_book else self.current_chapter, keyword, case_sensitive)
+        if cache_key not in self._search_cache:
+            results = []
+            
+            if whole_book:
+                # 逐章读取并搜索，不在内存中保留全文
+                # 位置换算为 UTF-16 码元，与章内搜索及光标位置使用同一单位
+                for chapter_index in range(len(self._chapter_titles)):
+                    chapter_text = self.read_chapter_text(chapter_index)
+                    positions = find_keyword(chapter_text, keyword, case_sensitive)
+                    results.extend((chapter_index, position) for position in
+                                   _utf16_positions(chapter_text, positions))
+            else:
+                # 在当前章节已排版的文档中查找，由 Qt 直接扫描，得到的位置与光标位置一致
+                _, document = self.get_chapter(self.current_chapter)
+                cursor = document.find(keyword, 0, find_flags)
+                while not cursor.isNull():
+                    results.append((self.current_chapter, cursor.selectionStart()))
+                    cursor = document.find(keyword, cursor, find_flags)
+            
+            self._search_cache[cache_key] = results
+        
+        self.search_results = list(self._search_cache[cache_key])
         
         if self.search_results:
             self.current_search_index = 0
@@ -868,27 +1248,40 @@ class NovelReader(QMainWindow):
             self.search_info_label.setText("未找到结果")
     
     def find_next(self):
-        """查找下一个"""
-        if self.search_results and self.current_search_index < len(self.search_results) - 1:
-            self.current_search_index += 1
-            self.highlight_search_result()
+        """查找下一个（从当前光标位置向后查找，切换章节或点击正文后也能继续）"""
+        if self.search_results:
+            position = (self.current_chapter, self.text_area.textCursor().selectionStart())
+            index = bisect.bisect_right(self.search_results, position)
+            if index < len(self.search_results):
+                self.current_search_index = index
+                self.highlight_search_result()
     
     def find_previous(self):
-        """查找上一个"""
-        if self.search_results and self.current_search_index > 0:
-            self.current_search_index -= 1
-            self.highlight_search_result()
+        """查找上一个（从当前光标位置向前查找）"""
+        if self.search_results:
+            position = (self.current_chapter, self.text_area.textCursor().selectionStart())
+            index = bisect.bisect_left(self.search_results, position) - 1
+            if index >= 0:
+                self.current_search_index = index
+                self.highlight_search_result()
     
     def highlight_search_result(self):
         """高亮搜索结果"""
         if self.search_results and 0 <= self.current_search_index < len(self.search_results):
-            position = self.search_results[self.current_search_index]
-            keyword = self.search_input.text()
+            chapter_index, position = self.search_results[self.current_search_index]
+            keyword = self._search_keyword
             
-            # 设置光标位置并选中关键词
-            cursor = self.text_area.textCursor()
-            cursor.setPosition(position)
-            cursor.setPosition(position + len(keyword), QTextCursor.KeepAnchor)
+            # 全书搜索的结果可能位于其他章节
+            if chapter_index != self.current_chapter:
+                self.display_chapter(chapter_index)
+            
+            # 从结果位置查找一次，直接选中实际匹配的文本（其 UTF-16 长度可能与 len(keyword) 不同）
+            cursor = self.text_area.document().find(keyword, position, self._search_find_flags)
+            if cursor.isNull() or cursor.selectionStart() != position:
+                cursor = self.text_area.textCursor()
+                cursor.setPosition(position)
+                cursor.setPosition(position + len(keyword.encode('utf-16-le')) // 2,
+                                   QTextCursor.KeepAnchor)
             self.text_area.setTextCursor(cursor)
             
             # 确保可见
@@ -906,7 +1299,7 @@ class NovelReader(QMainWindow):
         # 计算页码（假设每页1000字符）
         chars_per_page = 1000
         current_page = position // chars_per_page + 1
-        total_pages = len(self.text_area.toPlainText()) // chars_per_page + 1
+        total_pages = self._current_chapter_len // chars_per_page + 1
         
         self.page_label.setText(f"页码: {current_page}/{total_pages}")
         self.position_label.setText(f"位置: {position}")
@@ -965,7 +1358,13 @@ class NovelReader(QMainWindow):
     
     def closeEvent(self, event):
         """关闭事件"""
+        self.apply_font_size()  # 保存设置前应用还未生效的字号
         self.save_settings()
+        
+        # 等待仍在运行的解析线程结束，避免线程对象随窗口一起销毁
+        for thread in self.findChildren(ChapterParseThread):
+            thread.wait()
+        self.close_file_data()
         event.accept()
 
 